@@ -1,85 +1,399 @@
-import ccxt
+import ccxt.async_support as ccxt_async
+import ccxt.pro as ccxt_pro
 import pandas as pd
 import numpy as np
-import ta
-import time
+from numba import njit, prange
+from window_ops.online import RollingMax, RollingMean, RollingMin, RollingStd
+import asyncio
+import atexit
 import logging
 import json
 import os
+import copy
+import pickle
+import queue
 import smtplib
+import sys
+from dataclasses import dataclass
 from email.mime.text import MIMEText
+from logging.handlers import QueueHandler, QueueListener
 
 # -------------------------------
 # Logging Configuration
 # -------------------------------
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler("trading_bot.log", mode="a")
-    ]
-)
+# The real handlers sit behind a queue on a listener thread, so console
+# and file I/O never stall the processing loop; the loop only pays for
+# an enqueue per record.
+_log_formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+_stream_handler = logging.StreamHandler()
+_stream_handler.setFormatter(_log_formatter)
+_file_handler = logging.FileHandler("trading_bot.log", mode="a")
+_file_handler.setFormatter(_log_formatter)
+
+_log_queue = queue.Queue(-1)
+_log_listener = QueueListener(_log_queue, _stream_handler, _file_handler)
+_log_listener.start()
+atexit.register(_log_listener.stop)
+
+# The queue handler only merges args into the message; the listener's
+# handlers apply the timestamped format on their own thread.
+logging.basicConfig(level=logging.INFO, format='%(message)s', handlers=[QueueHandler(_log_queue)])
+logger = logging.getLogger(__name__)
 
 # -------------------------------
 # Parameter Loader & Default Parameters
 # -------------------------------
+# Parameters live in a frozen slots dataclass: attribute reads compile
+# to fixed-offset slot loads instead of dict hash lookups, typos raise
+# AttributeError instead of silently defaulting, and frozen guarantees
+# the hoisted module constants below can never drift from their source.
+@dataclass(frozen=True, slots=True)
+class Params:
+    emaFastLen: int = 50
+    emaSlowLen: int = 200
+    rsiLen: int = 14
+    stochLen: int = 14
+    bbLen: int = 20
+    bbMult: float = 2.0
+    macd_fast: int = 12
+    macd_slow: int = 26
+    macd_signal: int = 9
+    rsi_threshold_long: int = 55
+    rsi_threshold_short: int = 45
+    volAvg_window: int = 20
+    stoch_smooth_k: int = 3
+    stoch_smooth_d: int = 3
+    take_profit_pct: float = 0.04  # still available if needed elsewhere
+    stop_loss_pct: float = 0.02    # still available if needed elsewhere
+    leverage: int = 10
+    # ATR-based stop loss / take profit:
+    take_profit_atr_multiplier: float = 2
+    stop_loss_atr_multiplier: float = 1
+    sender_email: str = "renewal398@gmail.com"
+    sender_password: str = "iqgq ygia kfsx ybrw"
+    smtp_server: str = "smtp.gmail.com"
+    smtp_port: int = 587
+
+
 def load_parameters(config_file="config.json"):
     """
-    Load parameters from a JSON configuration file.
-    If the file is not found, default parameters are returned.
-    """
-    defaults = {
-        "emaFastLen": 50,
-        "emaSlowLen": 200,
-        "rsiLen": 14,
-        "stochLen": 14,
-        "bbLen": 20,
-        "bbMult": 2.0,
-        "macd_fast": 12,
-        "macd_slow": 26,
-        "macd_signal": 9,
-        "rsi_threshold_long": 55,
-        "rsi_threshold_short": 45,
-        "volAvg_window": 20,
-        "stoch_smooth_k": 3,
-        "stoch_smooth_d": 3,
-        "take_profit_pct": 0.04,  # still available if needed elsewhere
-        "stop_loss_pct": 0.02,    # still available if needed elsewhere
-        "leverage": 10,
-        # New keys for ATR-based stop loss / take profit:
-        "take_profit_atr_multiplier": 2,
-        "stop_loss_atr_multiplier": 1,
-        "sender_email": "renewal398@gmail.com",     
-        "sender_password": "iqgq ygia kfsx ybrw",   
-        "smtp_server": "smtp.gmail.com",
-        "smtp_port": 587
-    }
+    Load parameters from a JSON configuration file into a Params
+    instance. Unknown keys are ignored; missing keys keep the dataclass
+    defaults. If the file is not found, the defaults are returned.
+    """
+    overrides = {}
     if os.path.exists(config_file):
         try:
             with open(config_file, 'r') as f:
-                params = json.load(f)
-            logging.info("Parameters loaded from config file.")
-            defaults.update(params)
+                loaded = json.load(f)
+            overrides = {k: v for k, v in loaded.items() if k in Params.__dataclass_fields__}
+            logger.info("Parameters loaded from config file.")
         except Exception as e:
-            logging.error(f"Error loading parameters from {config_file}: {e}")
+            logger.error("Error loading parameters from %s: %s", config_file, e)
     else:
-        logging.info("Config file not found. Using default parameters.")
-    return defaults
+        logger.info("Config file not found. Using default parameters.")
+    return Params(**overrides)
 
 # Load parameters and assign to variables
-params = load_parameters()
-emaFastLen = params["emaFastLen"]
-emaSlowLen = params["emaSlowLen"]
-rsiLen     = params["rsiLen"]
-stochLen   = params["stochLen"]
-bbLen      = params["bbLen"]
-bbMult     = params["bbMult"]
+PARAMS = load_parameters()
+emaFastLen = PARAMS.emaFastLen
+emaSlowLen = PARAMS.emaSlowLen
+rsiLen     = PARAMS.rsiLen
+stochLen   = PARAMS.stochLen
+bbLen      = PARAMS.bbLen
+bbMult     = PARAMS.bbMult
+
+# Hoist the remaining hot-path parameters and the derived EWM alphas to
+# module constants once, so the per-bar updates and signal checks work
+# on plain numbers instead of re-doing dict lookups and divisions.
+MACD_FAST = PARAMS.macd_fast
+MACD_SLOW = PARAMS.macd_slow
+MACD_SIGNAL = PARAMS.macd_signal
+STOCH_SMOOTH_K = PARAMS.stoch_smooth_k
+STOCH_SMOOTH_D = PARAMS.stoch_smooth_d
+VOL_AVG_WINDOW = PARAMS.volAvg_window
+ATR_LEN = 14
+
+ALPHA_EMA_FAST = 2.0 / (emaFastLen + 1.0)
+ALPHA_EMA_SLOW = 2.0 / (emaSlowLen + 1.0)
+ALPHA_MACD_FAST = 2.0 / (MACD_FAST + 1.0)
+ALPHA_MACD_SLOW = 2.0 / (MACD_SLOW + 1.0)
+ALPHA_MACD_SIGNAL = 2.0 / (MACD_SIGNAL + 1.0)
+ALPHA_RSI = 1.0 / rsiLen
+ALPHA_ATR = 1.0 / ATR_LEN
+
+RSI_THRESHOLD_LONG = PARAMS.rsi_threshold_long
+RSI_THRESHOLD_SHORT = PARAMS.rsi_threshold_short
+LEVERAGE = PARAMS.leverage
+TP_ATR_MULTIPLIER = PARAMS.take_profit_atr_multiplier
+SL_ATR_MULTIPLIER = PARAMS.stop_loss_atr_multiplier
+
+# -------------------------------
+# Numba-fused indicator kernel
+# -------------------------------
+# All indicator math is fused into one nopython kernel over the raw
+# OHLCV arrays. The 300-row arrays stay resident in cache across the
+# whole computation instead of being re-traversed by a separate pandas
+# kernel per indicator. fastmath is deliberately left off: the kernels
+# rely on NaN propagation for warm-up heads.
+
+@njit(cache=True, nogil=True)
+def _first_valid(x):
+    """Index of the first non-NaN element (len(x) if all NaN)."""
+    for i in range(x.shape[0]):
+        if not np.isnan(x[i]):
+            return i
+    return x.shape[0]
+
+
+@njit(cache=True, nogil=True)
+def _ewm_mean(x, alpha):
+    """EWM mean with adjust=False semantics, skipping a NaN head."""
+    n = x.shape[0]
+    out = np.full(n, np.nan)
+    f = _first_valid(x)
+    if f == n:
+        return out
+    ewm = x[f]
+    out[f] = ewm
+    for i in range(f + 1, n):
+        ewm = alpha * x[i] + (1.0 - alpha) * ewm
+        out[i] = ewm
+    return out
+
+
+@njit(cache=True, nogil=True)
+def _rolling_mean(x, window):
+    """Rolling mean via a single running sum (one pass, O(1) update)."""
+    n = x.shape[0]
+    out = np.full(n, np.nan)
+    f = _first_valid(x)
+    s = 0.0
+    for i in range(f, n):
+        s += x[i]
+        if i - f + 1 > window:
+            s -= x[i - window]
+        if i - f + 1 >= window:
+            out[i] = s / window
+    return out
+
+
+@njit(cache=True, nogil=True)
+def _rolling_std(x, window):
+    """Rolling sample std (ddof=1) via running sum and sum of squares."""
+    n = x.shape[0]
+    out = np.full(n, np.nan)
+    f = _first_valid(x)
+    s = 0.0
+    sq = 0.0
+    for i in range(f, n):
+        s += x[i]
+        sq += x[i] * x[i]
+        if i - f + 1 > window:
+            s -= x[i - window]
+            sq -= x[i - window] * x[i - window]
+        if i - f + 1 >= window:
+            var = (sq - s * s / window) / (window - 1)
+            out[i] = np.sqrt(var) if var > 0.0 else 0.0
+    return out
+
+
+@njit(cache=True, nogil=True)
+def _rolling_min_max(x, window):
+    """Rolling min and max in one pass using monotonic deques."""
+    n = x.shape[0]
+    out_min = np.full(n, np.nan)
+    out_max = np.full(n, np.nan)
+    f = _first_valid(x)
+    # Index deques: monotonically increasing for min, decreasing for max.
+    min_q = np.empty(n, dtype=np.int64)
+    max_q = np.empty(n, dtype=np.int64)
+    min_head = min_tail = 0
+    max_head = max_tail = 0
+    for i in range(f, n):
+        while min_tail > min_head and x[min_q[min_tail - 1]] >= x[i]:
+            min_tail -= 1
+        min_q[min_tail] = i
+        min_tail += 1
+        while max_tail > max_head and x[max_q[max_tail - 1]] <= x[i]:
+            max_tail -= 1
+        max_q[max_tail] = i
+        max_tail += 1
+        if min_q[min_head] <= i - window:
+            min_head += 1
+        if max_q[max_head] <= i - window:
+            max_head += 1
+        if i - f + 1 >= window:
+            out_min[i] = x[min_q[min_head]]
+            out_max[i] = x[max_q[max_head]]
+    return out_min, out_max
+
+
+@njit(cache=True, nogil=True)
+def _compute_all(close, high, low, volume,
+                 ema_fast_len, ema_slow_len,
+                 macd_fast, macd_slow, macd_signal,
+                 rsi_len, stoch_len, smooth_k, smooth_d,
+                 bb_len, vol_window, atr_len):
+    """
+    Compute every indicator column from the raw OHLCV arrays in one
+    compiled pass. Returns the output arrays in the order they are
+    attached to the DataFrame in compute_indicators.
+    """
+    n = close.shape[0]
+
+    # === EMAs / MACD ===
+    ema_fast_arr = _ewm_mean(close, 2.0 / (ema_fast_len + 1.0))
+    ema_slow_arr = _ewm_mean(close, 2.0 / (ema_slow_len + 1.0))
+    macd_line = (_ewm_mean(close, 2.0 / (macd_fast + 1.0)) -
+                 _ewm_mean(close, 2.0 / (macd_slow + 1.0)))
+    signal_line = _ewm_mean(macd_line, 2.0 / (macd_signal + 1.0))
+    macd_hist = macd_line - signal_line
+
+    # === RSI (Wilder's smoothing) ===
+    gain = np.full(n, np.nan)
+    loss = np.full(n, np.nan)
+    for i in range(1, n):
+        delta = close[i] - close[i - 1]
+        gain[i] = delta if delta > 0.0 else 0.0
+        loss[i] = -delta if delta < 0.0 else 0.0
+    avg_gain = _ewm_mean(gain, 1.0 / rsi_len)
+    avg_loss = _ewm_mean(loss, 1.0 / rsi_len)
+    rsi = np.full(n, np.nan)
+    for i in range(1, n):
+        if avg_loss[i] == 0.0:
+            rsi[i] = 100.0
+        else:
+            rsi[i] = 100.0 - 100.0 / (1.0 + avg_gain[i] / avg_loss[i])
+
+    # === True Stochastic RSI ===
+    rsi_min, rsi_max = _rolling_min_max(rsi, stoch_len)
+    stoch_rsi = np.full(n, np.nan)
+    for i in range(n):
+        rng = rsi_max[i] - rsi_min[i]
+        if rng == 0.0:
+            stoch_rsi[i] = 0.0
+        else:
+            stoch_rsi[i] = (rsi[i] - rsi_min[i]) / rng
+    k = _rolling_mean(stoch_rsi, smooth_k)
+    d = _rolling_mean(k, smooth_d)
+
+    # === Bollinger Bands ===
+    basis = _rolling_mean(close, bb_len)
+    std = _rolling_std(close, bb_len)
+
+    # === Volume Filter ===
+    vol_avg = _rolling_mean(volume, vol_window)
+
+    # === ATR (Wilder's smoothing) ===
+    tr = np.empty(n)
+    if n > 0:
+        tr[0] = high[0] - low[0]
+    for i in range(1, n):
+        hl = high[i] - low[i]
+        hc = abs(high[i] - close[i - 1])
+        lc = abs(low[i] - close[i - 1])
+        tr[i] = max(hl, hc, lc)
+    atr = _ewm_mean(tr, 1.0 / atr_len)
+
+    return (ema_fast_arr, ema_slow_arr, macd_line, signal_line, macd_hist,
+            rsi, rsi_min, rsi_max, stoch_rsi, k, d, basis, std, vol_avg, atr)
+
+
+@njit(cache=True, nogil=True, parallel=True)
+def _compute_all_batch(close, high, low, volume,
+                       ema_fast_len, ema_slow_len,
+                       macd_fast, macd_slow, macd_signal,
+                       rsi_len, stoch_len, smooth_k, smooth_d,
+                       bb_len, vol_window, atr_len):
+    """
+    Run _compute_all over the columns of (n_bars, n_symbols) arrays,
+    one symbol per column, parallelized across the symbol axis. The
+    kernel is dispatched once for the whole batch instead of once per
+    symbol. Returns a (15, n_bars, n_symbols) array in _compute_all's
+    output order.
+    """
+    n, m = close.shape
+    out = np.empty((15, n, m))
+    for j in prange(m):
+        res = _compute_all(
+            np.ascontiguousarray(close[:, j]), np.ascontiguousarray(high[:, j]),
+            np.ascontiguousarray(low[:, j]), np.ascontiguousarray(volume[:, j]),
+            ema_fast_len, ema_slow_len,
+            macd_fast, macd_slow, macd_signal,
+            rsi_len, stoch_len, smooth_k, smooth_d,
+            bb_len, vol_window, atr_len)
+        out[0, :, j] = res[0]
+        out[1, :, j] = res[1]
+        out[2, :, j] = res[2]
+        out[3, :, j] = res[3]
+        out[4, :, j] = res[4]
+        out[5, :, j] = res[5]
+        out[6, :, j] = res[6]
+        out[7, :, j] = res[7]
+        out[8, :, j] = res[8]
+        out[9, :, j] = res[9]
+        out[10, :, j] = res[10]
+        out[11, :, j] = res[11]
+        out[12, :, j] = res[12]
+        out[13, :, j] = res[13]
+        out[14, :, j] = res[14]
+    return out
+
+
+# Warm the JIT cache on tiny dummy arrays at import time so the first
+# symbol does not pay the compile cost (cache=True persists the
+# compiled kernels across runs). The fetched history is float32, so
+# that is the specialization to warm.
+_dummy = np.array([1.0, 2.0, 3.0], dtype=np.float32)
+_compute_all(_dummy, _dummy, _dummy, _dummy, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2)
+_dummy2 = _dummy.reshape(-1, 1)
+_compute_all_batch(_dummy2, _dummy2, _dummy2, _dummy2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2)
 
 # -------------------------------
 # Setup exchange (MEXC example)
 # -------------------------------
-exchange = ccxt.mexc({'enableRateLimit': True})
+# The async client lets one batch of fetch_ohlcv calls share an event
+# loop, so the per-symbol round-trips overlap instead of chaining
+# serially. A fresh client is created per batch because its aiohttp
+# session is bound to the running event loop.
+def create_exchange():
+    return ccxt_async.mexc({'enableRateLimit': True})
+
+# Cap the number of simultaneous OHLCV requests so a full sweep of the
+# symbol list stays within MEXC's per-IP limits.
+MAX_CONCURRENT_FETCHES = 4
+
+# Market metadata barely changes, but ccxt implicitly downloads the full
+# market list (a multi-MB response on MEXC) before the first request on
+# every fresh client. Cache it on disk and inject it with set_markets(),
+# refreshing once a week.
+MARKETS_FILE = "markets.json"
+MARKETS_MAX_AGE = 7 * 24 * 3600
+
+async def ensure_markets(exchange):
+    """
+    Load market metadata into the exchange client, preferring the local
+    cache when it is less than a week old. Falls back to a live
+    load_markets() call and refreshes the cache.
+    """
+    try:
+        if os.path.exists(MARKETS_FILE):
+            age = pd.Timestamp.now().timestamp() - os.path.getmtime(MARKETS_FILE)
+            if age < MARKETS_MAX_AGE:
+                with open(MARKETS_FILE, "r") as f:
+                    exchange.set_markets(json.load(f))
+                logger.info("Loaded market metadata from %s.", MARKETS_FILE)
+                return
+    except Exception as e:
+        logger.error("Error reading cached markets from %s: %s", MARKETS_FILE, e)
+    try:
+        markets = await exchange.load_markets()
+        with open(MARKETS_FILE, "w") as f:
+            json.dump(markets, f)
+        logger.info("Refreshed market metadata cache (%d markets).", len(markets))
+    except Exception as e:
+        logger.error("Error refreshing market metadata: %s", e)
 
 # -------------------------------
 # List of Symbols to Check
@@ -96,173 +410,596 @@ symbols = [
 # -------------------------------
 # Function: Fetch Data
 # -------------------------------
-def fetch_data(symbol, timeframe='1h', limit=300):
+async def fetch_data(exchange, symbol, semaphore, timeframe='1h', limit=300):
     """
     Fetch historical OHLCV data with error handling.
     Returns a pandas DataFrame with the relevant columns.
     """
     try:
-        data = exchange.fetch_ohlcv(symbol, timeframe=timeframe, limit=limit)
+        async with semaphore:
+            data = await exchange.fetch_ohlcv(symbol, timeframe=timeframe, limit=limit)
         df = pd.DataFrame(data, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
         df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-        logging.info(f"Fetched {len(df)} records for {symbol} on timeframe {timeframe}.")
+        # float32 has ample precision (~7 significant digits) for
+        # signal decisions on <=300-bar windows and halves the memory
+        # bandwidth of every pass over the history. TP/SL math still
+        # happens in Python floats (float64) off the SignalState.
+        ohlcv_cols = ['open', 'high', 'low', 'close', 'volume']
+        df[ohlcv_cols] = df[ohlcv_cols].astype(np.float32)
+        logger.info("Fetched %d records for %s on timeframe %s.", len(df), symbol, timeframe)
         return df
     except Exception as e:
-        logging.error(f"Error fetching data for {symbol}: {e}")
+        logger.error("Error fetching data for %s: %s", symbol, e)
         return None
 
+async def fetch_all(requests, timeframe='1h'):
+    """
+    Fetch OHLCV for a list of (symbol, limit) pairs concurrently on one
+    async exchange client. Returns a dict mapping each symbol to its
+    DataFrame (None where the fetch failed).
+    """
+    exchange = create_exchange()
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_FETCHES)
+    try:
+        await ensure_markets(exchange)
+        frames = await asyncio.gather(*(
+            fetch_data(exchange, symbol, semaphore, timeframe, limit)
+            for symbol, limit in requests
+        ))
+    finally:
+        await exchange.close()
+    return {symbol: frame for (symbol, _), frame in zip(requests, frames)}
+
 # -------------------------------
 # Function: Compute Indicators
 # -------------------------------
 def compute_indicators(df):
     """
-    Compute technical indicators similar to the Pine script.
-    Adds EMAs, MACD, RSI, Stochastic RSI, Bollinger Bands, volume filter,
-    price action confirmation, and ATR to the DataFrame.
+    Compute technical indicators similar to the Pine script: EMAs,
+    MACD, RSI, Stochastic RSI, Bollinger Bands, volume filter, and ATR.
+    Returns the kernel's tuple of indicator arrays (in _compute_all
+    order) without touching the DataFrame — only the array tails are
+    ever consumed, so no columns are materialized. Returns None on
+    failure.
     """
     try:
-        # === EMAs ===
-        df['emaFast'] = df['close'].ewm(span=emaFastLen, adjust=False).mean()
-        df['emaSlow'] = df['close'].ewm(span=emaSlowLen, adjust=False).mean()
-
-        # === MACD ===
-        macd = ta.trend.MACD(
-            df['close'], 
-            window_slow=params["macd_slow"], 
-            window_fast=params["macd_fast"], 
-            window_sign=params["macd_signal"]
+        # Feed the history in its stored float32 form; the kernel's
+        # accumulators are float64, so only input bandwidth is halved.
+        close = np.ascontiguousarray(df['close'].to_numpy(dtype=np.float32))
+        high = np.ascontiguousarray(df['high'].to_numpy(dtype=np.float32))
+        low = np.ascontiguousarray(df['low'].to_numpy(dtype=np.float32))
+        volume = np.ascontiguousarray(df['volume'].to_numpy(dtype=np.float32))
+
+        results = _compute_all(
+            close, high, low, volume,
+            emaFastLen, emaSlowLen,
+            MACD_FAST, MACD_SLOW, MACD_SIGNAL,
+            rsiLen, stochLen, STOCH_SMOOTH_K, STOCH_SMOOTH_D,
+            bbLen, VOL_AVG_WINDOW, ATR_LEN
         )
-        df['macdLine'] = macd.macd()
-        df['signalLine'] = macd.macd_signal()
-        df['macdHist'] = macd.macd_diff()
+        logger.info("Technical indicators computed successfully.")
+        return results
+    except Exception as e:
+        logger.error("Error computing indicators: %s", e)
+        return None
+
+def compute_indicators_batch(frames):
+    """
+    Compute indicators for several symbols' DataFrames at once.
+    Equal-length frames are stacked into (n_bars, n_symbols) arrays and
+    run through one parallel kernel dispatch, amortizing launch
+    overhead across the symbol axis; odd-length frames fall back to the
+    per-symbol path. Returns a dict mapping each symbol to its tuple of
+    indicator arrays.
+    """
+    out = {}
+    groups = {}
+    for symbol, df in frames.items():
+        groups.setdefault(len(df), []).append(symbol)
+
+    for length, group in groups.items():
+        if len(group) < 2 or length < 2:
+            for symbol in group:
+                out[symbol] = compute_indicators(frames[symbol])
+            continue
+        try:
+            close = np.column_stack([frames[s]['close'].to_numpy(dtype=np.float32) for s in group])
+            high = np.column_stack([frames[s]['high'].to_numpy(dtype=np.float32) for s in group])
+            low = np.column_stack([frames[s]['low'].to_numpy(dtype=np.float32) for s in group])
+            volume = np.column_stack([frames[s]['volume'].to_numpy(dtype=np.float32) for s in group])
+
+            results = _compute_all_batch(
+                close, high, low, volume,
+                emaFastLen, emaSlowLen,
+                MACD_FAST, MACD_SLOW, MACD_SIGNAL,
+                rsiLen, stochLen, STOCH_SMOOTH_K, STOCH_SMOOTH_D,
+                bbLen, VOL_AVG_WINDOW, ATR_LEN
+            )
+            for idx, symbol in enumerate(group):
+                out[symbol] = tuple(results[i, :, idx] for i in range(15))
+            logger.info("Technical indicators batch-computed for %d symbols.", len(group))
+        except Exception as e:
+            logger.error("Error in batched indicator computation: %s", e)
+            for symbol in group:
+                out[symbol] = compute_indicators(frames[symbol])
+    return out
+
+# -------------------------------
+# Incremental Indicator State
+# -------------------------------
+# Recomputing 300 bars of history per symbol per run is wasted work on
+# an hourly timeframe: at most one bar has closed since the last run.
+# IndicatorState persists the EWM/Wilder recurrence values and
+# window_ops online statistics for the windowed indicators, so a warm
+# run advances each symbol in O(1) from a 3-bar fetch instead of a
+# full recompute.
+
+STATE_FILE = "indicator_state.pkl"
+
+@dataclass(slots=True)
+class SignalState:
+    """
+    The newest bar's indicator values as plain scalars — everything
+    check_signals and the alert formatting read, and nothing else.
+    Attribute access on a slots dataclass avoids the per-lookup
+    dispatch that DataFrame rows and dicts pay.
+    """
+    timestamp: object
+    close: float
+    volume: float
+    emaFast: float
+    emaSlow: float
+    macdLine: float
+    signalLine: float
+    macdHist: float
+    rsi: float
+    k: float
+    d: float
+    basis: float
+    std: float
+    volAvg: float
+    atr: float
+    bullishBreakout: bool
+    bearishBreakdown: bool
+
+class IndicatorState:
+    """
+    O(1)-updatable indicator state for one symbol.
+
+    Holds the last value of every EWM recurrence (EMAs, MACD, Wilder
+    RSI averages, ATR) plus window_ops online statistics covering the
+    rolling windows (stochastic RSI, Bollinger basis/std, volume
+    average), each updatable in O(1) amortized. The state is
+    kept at the last *closed* bar; the still-forming bar is applied to
+    a throwaway copy via preview() so its changing values never pollute
+    the cache.
+    """
+
+    @classmethod
+    def from_arrays(cls, df, results):
+        """
+        Seed the state from a DataFrame of closed bars and the kernel's
+        indicator arrays for those bars (as returned by
+        compute_indicators / compute_indicators_batch).
+        """
+        (ema_fast, ema_slow, macd_line, signal_line, macd_hist,
+         rsi, rsi_min, rsi_max, stoch_rsi, k, d,
+         basis, std, vol_avg, atr) = results
+
+        state = cls()
+        close = df['close'].to_numpy(dtype=np.float64)
+        volume = df['volume'].to_numpy(dtype=np.float64)
+
+        state.last_timestamp = df['timestamp'].iloc[-1]
+        state.ema_fast = float(ema_fast[-1])
+        state.ema_slow = float(ema_slow[-1])
+        # The MACD component EMAs are internal to the kernel; replay
+        # them from the close series so the recurrences can continue.
+        state.macd_ema_fast = _ewm_mean(close, ALPHA_MACD_FAST)[-1]
+        state.macd_ema_slow = _ewm_mean(close, ALPHA_MACD_SLOW)[-1]
+        state.signal_line = float(signal_line[-1])
+
+        # Wilder RSI averages are internal to the kernel; replay them too.
+        delta = np.diff(close)
+        state.avg_gain = _ewm_mean(np.maximum(delta, 0.0), ALPHA_RSI)[-1]
+        state.avg_loss = _ewm_mean(np.maximum(-delta, 0.0), ALPHA_RSI)[-1]
+
+        state.atr = float(atr[-1])
+        state.prev_close = float(close[-1])
+        state.prev_high = float(df['high'].iloc[-1])
+        state.prev_low = float(df['low'].iloc[-1])
+
+        # Rolling statistics as window_ops online objects: fit on the
+        # window tail once, then each new bar is an O(1) update().
+        state.rsi_min_stat = RollingMin(stochLen)
+        state.rsi_min_stat.fit_transform(rsi[-stochLen:])
+        state.rsi_max_stat = RollingMax(stochLen)
+        state.rsi_max_stat.fit_transform(rsi[-stochLen:])
+        state.k_stat = RollingMean(STOCH_SMOOTH_K)
+        state.k_stat.fit_transform(stoch_rsi[-STOCH_SMOOTH_K:])
+        state.d_stat = RollingMean(STOCH_SMOOTH_D)
+        state.d_stat.fit_transform(k[-STOCH_SMOOTH_D:])
+        state.basis_stat = RollingMean(bbLen)
+        state.basis_stat.fit_transform(close[-bbLen:])
+        state.std_stat = RollingStd(bbLen)
+        state.std_stat.fit_transform(close[-bbLen:])
+        state.vol_stat = RollingMean(VOL_AVG_WINDOW)
+        state.vol_stat.fit_transform(volume[-VOL_AVG_WINDOW:])
+        state.latest = None
+        return state
+
+    def update(self, bar):
+        """
+        Apply one bar (a row with timestamp/open/high/low/close/volume)
+        to every recurrence and rolling statistic. Returns a
+        SignalState with the latest indicator values for signal
+        checking.
+        """
+        close = float(bar['close'])
+        high = float(bar['high'])
+        low = float(bar['low'])
+        volume = float(bar['volume'])
 
-        # === RSI ===
-        rsi_indicator = ta.momentum.RSIIndicator(df['close'], window=rsiLen)
-        df['rsi'] = rsi_indicator.rsi()
+        # === EMAs / MACD ===
+        self.ema_fast = ALPHA_EMA_FAST * close + (1.0 - ALPHA_EMA_FAST) * self.ema_fast
+        self.ema_slow = ALPHA_EMA_SLOW * close + (1.0 - ALPHA_EMA_SLOW) * self.ema_slow
+
+        self.macd_ema_fast = ALPHA_MACD_FAST * close + (1.0 - ALPHA_MACD_FAST) * self.macd_ema_fast
+        self.macd_ema_slow = ALPHA_MACD_SLOW * close + (1.0 - ALPHA_MACD_SLOW) * self.macd_ema_slow
+        macd_line = self.macd_ema_fast - self.macd_ema_slow
+        self.signal_line = ALPHA_MACD_SIGNAL * macd_line + (1.0 - ALPHA_MACD_SIGNAL) * self.signal_line
+        macd_hist = macd_line - self.signal_line
+
+        # === RSI (Wilder's smoothing) ===
+        delta = close - self.prev_close
+        gain = delta if delta > 0.0 else 0.0
+        loss = -delta if delta < 0.0 else 0.0
+        self.avg_gain += (gain - self.avg_gain) * ALPHA_RSI
+        self.avg_loss += (loss - self.avg_loss) * ALPHA_RSI
+        if self.avg_loss == 0.0:
+            rsi = 100.0
+        else:
+            rsi = 100.0 - 100.0 / (1.0 + self.avg_gain / self.avg_loss)
 
         # === True Stochastic RSI ===
-        df['rsi_min'] = df['rsi'].rolling(window=stochLen).min()
-        df['rsi_max'] = df['rsi'].rolling(window=stochLen).max()
-        df['stochRSI'] = np.where(
-            (df['rsi_max'] - df['rsi_min']) == 0,
-            0,
-            (df['rsi'] - df['rsi_min']) / (df['rsi_max'] - df['rsi_min'])
-        )
-        df['k'] = df['stochRSI'].rolling(window=params["stoch_smooth_k"]).mean()
-        df['d'] = df['k'].rolling(window=params["stoch_smooth_d"]).mean()
+        rsi_min = self.rsi_min_stat.update(rsi)
+        rsi_max = self.rsi_max_stat.update(rsi)
+        rng = rsi_max - rsi_min
+        stoch_rsi = 0.0 if rng == 0.0 else (rsi - rsi_min) / rng
+        k = self.k_stat.update(stoch_rsi)
+        d = self.d_stat.update(k)
 
         # === Bollinger Bands ===
-        df['basis'] = df['close'].rolling(window=bbLen).mean()
-        df['std'] = df['close'].rolling(window=bbLen).std()
-        df['upperBB'] = df['basis'] + bbMult * df['std']
-        df['lowerBB'] = df['basis'] - bbMult * df['std']
+        basis = self.basis_stat.update(close)
+        std = self.std_stat.update(close)
 
         # === Volume Filter ===
-        df['volAvg'] = df['volume'].rolling(window=params["volAvg_window"]).mean()
-
-        # === Price Action Confirmation ===
-        df['prevHigh'] = df['high'].shift(1)
-        df['prevLow'] = df['low'].shift(1)
-        df['bullishBreakout'] = df['close'] > df['prevHigh']
-        df['bearishBreakdown'] = df['close'] < df['prevLow']
-
-        # === ATR Calculation ===
-        atr_indicator = ta.volatility.AverageTrueRange(
-            high=df['high'], 
-            low=df['low'], 
-            close=df['close'], 
-            window=14  # You can adjust the period as needed
+        vol_avg = self.vol_stat.update(volume)
+
+        # === ATR (Wilder's smoothing) ===
+        tr = max(high - low, abs(high - self.prev_close), abs(low - self.prev_close))
+        self.atr += (tr - self.atr) * ALPHA_ATR
+
+        self.latest = SignalState(
+            timestamp=bar['timestamp'],
+            close=close,
+            volume=volume,
+            emaFast=self.ema_fast,
+            emaSlow=self.ema_slow,
+            macdLine=macd_line,
+            signalLine=self.signal_line,
+            macdHist=macd_hist,
+            rsi=rsi,
+            k=k,
+            d=d,
+            basis=basis,
+            std=std,
+            volAvg=vol_avg,
+            atr=self.atr,
+            bullishBreakout=close > self.prev_high,
+            bearishBreakdown=close < self.prev_low,
         )
-        df['atr'] = atr_indicator.average_true_range()
 
-        logging.info("Technical indicators computed successfully.")
-        return df
+        self.prev_close = close
+        self.prev_high = high
+        self.prev_low = low
+        self.last_timestamp = bar['timestamp']
+        return self.latest
+
+    def preview(self, bar):
+        """
+        Apply a still-forming bar to a copy of the state, leaving the
+        cached closed-bar state untouched.
+        """
+        return copy.deepcopy(self).update(bar)
+
+    def advance(self, df):
+        """
+        Reconcile the cached state with freshly fetched tail bars.
+        Permanently applies any newly closed bars, then previews the
+        forming last bar. Returns the latest indicator values, or None
+        if the cached state no longer lines up with the fetched data
+        (e.g. a gap longer than the fetched tail) and a full rebuild is
+        needed.
+        """
+        timestamps = list(df['timestamp'])
+        if self.last_timestamp not in timestamps:
+            return None
+        start = timestamps.index(self.last_timestamp) + 1
+        if start >= len(df):
+            # Nothing newer than our cached bar; re-preview the cached
+            # latest view is not possible, force a rebuild.
+            return None
+        # All fetched bars after our cached one except the last are closed.
+        for i in range(start, len(df) - 1):
+            self.update(df.iloc[i])
+        return self.preview(df.iloc[-1])
+
+# -------------------------------
+# State Cache Persistence
+# -------------------------------
+def load_states(state_file=STATE_FILE):
+    """
+    Load the per-symbol indicator state cache from disk.
+    Returns an empty dict if the file is missing or unreadable.
+    """
+    if os.path.exists(state_file):
+        try:
+            with open(state_file, 'rb') as f:
+                states = pickle.load(f)
+            logger.info("Loaded indicator state for %d symbols.", len(states))
+            return states
+        except Exception as e:
+            logger.error("Error loading indicator state from %s: %s", state_file, e)
+    return {}
+
+def save_states(states, state_file=STATE_FILE):
+    """Persist the per-symbol indicator state cache to disk."""
+    try:
+        with open(state_file, 'wb') as f:
+            pickle.dump(states, f)
     except Exception as e:
-        logging.error(f"Error computing indicators: {e}")
-        return df
+        logger.error("Error saving indicator state to %s: %s", state_file, e)
 
 # -------------------------------
 # Function: Check Signals
 # -------------------------------
-def check_signals(df):
+def check_signals(latest):
     """
     Determine if the latest bar triggers a buy or sell signal.
+    `latest` is the newest bar's SignalState.
     Returns a tuple of booleans for (longSignal, shortSignal).
     """
     try:
-        if df is None or df.empty:
-            logging.warning("DataFrame is empty. Cannot check signals.")
+        if latest is None:
+            logger.warning("No indicator values available. Cannot check signals.")
             return False, False
 
-        latest = df.iloc[-1]
+        # Pull every value out once so the condition chains below are
+        # pure scalar compares on locals.
+        close = latest.close
+        volume = latest.volume
+        ema_fast = latest.emaFast
+        ema_slow = latest.emaSlow
+        macd_line = latest.macdLine
+        signal_line = latest.signalLine
+        macd_hist = latest.macdHist
+        rsi = latest.rsi
+        k = latest.k
+        d = latest.d
+        basis = latest.basis
+        vol_avg = latest.volAvg
+        bullish_breakout = latest.bullishBreakout
+        bearish_breakdown = latest.bearishBreakdown
 
         longCondition = (
-            latest['close'] > latest['emaFast'] and
-            latest['close'] > latest['emaSlow'] and
-            latest['macdLine'] > latest['signalLine'] and
-            latest['macdHist'] > 0 and
-            latest['rsi'] > params["rsi_threshold_long"] and
-            latest['k'] > latest['d'] and
-            latest['close'] > latest['basis'] and
-            latest['volume'] > latest['volAvg'] and
-            latest['bullishBreakout']
+            close > ema_fast and
+            close > ema_slow and
+            macd_line > signal_line and
+            macd_hist > 0 and
+            rsi > RSI_THRESHOLD_LONG and
+            k > d and
+            close > basis and
+            volume > vol_avg and
+            bullish_breakout
         )
 
         shortCondition = (
-            latest['close'] < latest['emaFast'] and
-            latest['close'] < latest['emaSlow'] and
-            latest['macdLine'] < latest['signalLine'] and
-            latest['macdHist'] < 0 and
-            latest['rsi'] < params["rsi_threshold_short"] and
-            latest['k'] < latest['d'] and
-            latest['close'] < latest['basis'] and
-            latest['volume'] > latest['volAvg'] and
-            latest['bearishBreakdown']
+            close < ema_fast and
+            close < ema_slow and
+            macd_line < signal_line and
+            macd_hist < 0 and
+            rsi < RSI_THRESHOLD_SHORT and
+            k < d and
+            close < basis and
+            volume > vol_avg and
+            bearish_breakdown
         )
 
-        logging.info(f"Signals checked: Long signal: {longCondition}, Short signal: {shortCondition}")
+        logger.info("Signals checked: Long signal: %s, Short signal: %s", longCondition, shortCondition)
         return longCondition, shortCondition
     except Exception as e:
-        logging.error(f"Error checking signals: {e}")
+        logger.error("Error checking signals: %s", e)
         return False, False
 
 # -------------------------------
-# Function: Send Alert via Email
+# Function: Send Alerts via Email
 # -------------------------------
-def send_alert(message):
+def send_alerts(messages):
     """
-    Sends an email alert to the designated recipient.
+    Sends a batch of email alerts to the designated recipient over a
+    single SMTP session, so the TCP/TLS handshake and login happen once
+    per cycle instead of once per alert.
     For this example, the recipient is set to a hardcoded email.
     """
+    if not messages:
+        return
     try:
         subject = "Trading Bot Alert"
-        sender_email = params.get("sender_email")
-        sender_password = params.get("sender_password")
+        sender_email = PARAMS.sender_email
+        sender_password = PARAMS.sender_password
         recipient_email = "prakashsteve5@gmail.com"
-        smtp_server = params.get("smtp_server")
-        smtp_port = params.get("smtp_port")
+        smtp_server = PARAMS.smtp_server
+        smtp_port = PARAMS.smtp_port
 
         if not sender_email or not sender_password:
-            logging.error("Sender email credentials are not set. Check your configuration.")
+            logger.error("Sender email credentials are not set. Check your configuration.")
             return
 
-        # Create the email message
-        msg = MIMEText(message)
-        msg["Subject"] = subject
-        msg["From"] = sender_email
-        msg["To"] = recipient_email
-
-        # Send the email via SMTP with TLS
+        # Open one SMTP session with TLS for the whole batch
         server = smtplib.SMTP(smtp_server, smtp_port)
-        server.ehlo()
-        server.starttls()
-        server.login(sender_email, sender_password)
-        server.sendmail(sender_email, recipient_email, msg.as_string())
-        server.quit()
+        try:
+            server.ehlo()
+            server.starttls()
+            server.login(sender_email, sender_password)
+            for message in messages:
+                msg = MIMEText(message)
+                msg["Subject"] = subject
+                msg["From"] = sender_email
+                msg["To"] = recipient_email
+                server.sendmail(sender_email, recipient_email, msg.as_string())
+        finally:
+            server.quit()
 
-        logging.info("Email sent successfully.")
+        logger.info("Sent %d alert email(s) successfully.", len(messages))
     except Exception as e:
-        logging.error(f"Error sending email alert: {e}")
+        logger.error("Error sending email alerts: %s", e)
+
+# -------------------------------
+# Function: Build Alert Message
+# -------------------------------
+def build_alert(symbol, latest):
+    """
+    Check the latest indicator values for a signal and format the alert
+    message with ATR-based take profit / stop loss. Returns the message
+    string, or None when no signal fired. Shared by the polling and
+    streaming paths.
+    """
+    longSignal, shortSignal = check_signals(latest)
+
+    # Get the last close price for calculations
+    last_close = latest.close
+    leverage = LEVERAGE
+
+    # Safeguard against invalid price
+    if last_close <= 0:
+        logger.error("Invalid last_close price for %s: %s", symbol, last_close)
+        return None
+
+    # Use ATR for stop loss and take profit calculations
+    atr_value = latest.atr if not np.isnan(latest.atr) else last_close * 0.02
+    tp_atr_multiplier = TP_ATR_MULTIPLIER
+    sl_atr_multiplier = SL_ATR_MULTIPLIER
+
+    # For a long (buy) signal:
+    if longSignal:
+        take_profit = last_close + (atr_value * tp_atr_multiplier)
+        stop_loss = last_close - (atr_value * sl_atr_multiplier)
+        profit_formula = (
+            f"Profit formula (Long): ((TakeProfit - Entry Price) / Entry Price) * Leverage * 100%.\n"
+            f"In numbers: (({take_profit:.6f} - {last_close:.6f}) / {last_close:.6f}) * {leverage} * 100 = "
+            f"{((take_profit - last_close) / last_close) * leverage * 100:.6f}%"
+        )
+        return (
+            f"Buy signal triggered for {symbol} at price {last_close:.6f}.\n"
+            f"Take Profit: {take_profit:.6f}, Stop Loss: {stop_loss:.6f}.\n"
+            f"{profit_formula}"
+        )
+
+    # For a short (sell) signal:
+    if shortSignal:
+        take_profit = last_close - (atr_value * tp_atr_multiplier)
+        stop_loss = last_close + (atr_value * sl_atr_multiplier)
+        profit_formula = (
+            f"Profit formula (Short): ((Entry Price - TakeProfit) / Entry Price) * Leverage * 100%.\n"
+            f"In numbers: (({last_close:.6f} - {take_profit:.6f}) / {last_close:.6f}) * {leverage} * 100 = "
+            f"{((last_close - take_profit) / last_close) * leverage * 100:.6f}%"
+        )
+        return (
+            f"Sell signal triggered for {symbol} at price {last_close:.6f}.\n"
+            f"Take Profit: {take_profit:.6f}, Stop Loss: {stop_loss:.6f}.\n"
+            f"{profit_formula}"
+        )
+
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("No signal for %s at %s (Close: %.6f)", symbol, latest.timestamp, last_close)
+    return None
+
+# -------------------------------
+# Function: Process a Single Symbol
+# -------------------------------
+def process_symbol(symbol, state, df, seed_results=None):
+    """
+    Evaluate one symbol from prefetched OHLCV data. With a cached
+    IndicatorState the DataFrame is a short tail and the indicators
+    advance in O(1); without one it is the full history and the state
+    is rebuilt (from seed_results when the caller batch-computed the
+    seed indicator arrays already). Returns (alert message or None,
+    updated state). The state comes back as None when the cached one
+    went stale, signalling main() to retry with a full history.
+    """
+    if df is None or df.empty:
+        logger.error("No data fetched for %s. Skipping.", symbol)
+        return None, state
+
+    # Warm path: advance the cached state from the short tail fetch.
+    if state is not None:
+        latest = state.advance(df)
+        if latest is None:
+            logger.info("Cached state for %s is stale. Rebuilding from full history.", symbol)
+            return None, None
+
+    # Cold path: full compute, reseed the state.
+    else:
+        # from_arrays needs at least two closed bars (the RSI seeding
+        # diffs the close series), plus the forming last bar.
+        if len(df) < 3:
+            logger.error("Not enough data for %s (%d bars). Skipping.", symbol, len(df))
+            return None, None
+        # Seed the state from the closed bars, then preview the
+        # still-forming last bar for this cycle's signal.
+        closed = df.iloc[:-1]
+        if seed_results is None:
+            seed_results = compute_indicators(closed)
+        if seed_results is None:
+            return None, None
+        state = IndicatorState.from_arrays(closed, seed_results)
+        latest = state.preview(df.iloc[-1])
+
+    return build_alert(symbol, latest), state
+
+# -------------------------------
+# Function: Process a Round of Symbols
+# -------------------------------
+def process_round(round_symbols, data, states, alerts):
+    """
+    Evaluate one round of prefetched symbols, updating states and
+    collecting alert messages in place. Symbols without a cached state
+    get their seed indicators batch-computed across the round in one
+    kernel dispatch. Returns the symbols whose cached state went stale
+    and needs a full-history retry.
+    """
+    seeds = compute_indicators_batch({
+        symbol: data[symbol].iloc[:-1]
+        for symbol in round_symbols
+        if symbol not in states and data.get(symbol) is not None and len(data[symbol]) >= 3
+    })
+
+    stale = []
+    for symbol in round_symbols:
+        try:
+            message, state = process_symbol(
+                symbol, states.get(symbol), data.get(symbol), seeds.get(symbol))
+            if state is None and symbol in states:
+                stale.append(symbol)
+                continue
+            if state is not None:
+                states[symbol] = state
+            if message:
+                alerts.append(message)
+        except Exception as e:
+            logger.error("Error processing %s: %s", symbol, e)
+    return stale
 
 # -------------------------------
 # Main Function: Trading Logic
@@ -271,72 +1008,120 @@ def main():
     timeframe = '1h'
     limit = 300
 
-    for symbol in symbols:
-        try:
-            # Fetch data for the symbol
-            df = fetch_data(symbol, timeframe, limit)
-            if df is None or df.empty:
-                logging.error(f"No data fetched for {symbol}. Skipping.")
-                continue
+    states = load_states()
+    alerts = []
 
-            # Compute technical indicators (including ATR)
-            df = compute_indicators(df)
+    # One batched round of requests: a short tail where a cached state
+    # exists, the full history otherwise. The fetches run concurrently
+    # on the event loop, so wall time is set by the slowest round-trip
+    # rather than the sum of them. The indicator step stays inline:
+    # with the incremental state it is O(1) per symbol, far below the
+    # cost of farming it out to another process.
+    data = asyncio.run(fetch_all(
+        [(symbol, 3 if symbol in states else limit) for symbol in symbols],
+        timeframe))
 
-            # Check for signals
-            longSignal, shortSignal = check_signals(df)
+    rebuild = process_round(symbols, data, states, alerts)
 
-            # Get the last close price for calculations
-            last_close = df.iloc[-1]['close']
-            leverage = params.get("leverage", 1)
-            
-            # Safeguard against invalid price
-            if last_close <= 0:
-                logging.error(f"Invalid last_close price for {symbol}: {last_close}")
-                continue
-            
-            # Use ATR for stop loss and take profit calculations
-            atr_value = df.iloc[-1]['atr'] if 'atr' in df.columns else last_close * 0.02
-            tp_atr_multiplier = params.get("take_profit_atr_multiplier", 2)
-            sl_atr_multiplier = params.get("stop_loss_atr_multiplier", 1)
-
-            # For a long (buy) signal:
-            if longSignal:
-                take_profit = last_close + (atr_value * tp_atr_multiplier)
-                stop_loss = last_close - (atr_value * sl_atr_multiplier)
-                profit_formula = (
-                    f"Profit formula (Long): ((TakeProfit - Entry Price) / Entry Price) * Leverage * 100%.\n"
-                    f"In numbers: (({take_profit:.6f} - {last_close:.6f}) / {last_close:.6f}) * {leverage} * 100 = "
-                    f"{((take_profit - last_close) / last_close) * leverage * 100:.6f}%"
-                )
-                message = (
-                    f"Buy signal triggered for {symbol} at price {last_close:.6f}.\n"
-                    f"Take Profit: {take_profit:.6f}, Stop Loss: {stop_loss:.6f}.\n"
-                    f"{profit_formula}"
-                )
-                send_alert(message)
-
-            # For a short (sell) signal:
-            elif shortSignal:
-                take_profit = last_close - (atr_value * tp_atr_multiplier)
-                stop_loss = last_close + (atr_value * sl_atr_multiplier)
-                profit_formula = (
-                    f"Profit formula (Short): ((Entry Price - TakeProfit) / Entry Price) * Leverage * 100%.\n"
-                    f"In numbers: (({last_close:.6f} - {take_profit:.6f}) / {last_close:.6f}) * {leverage} * 100 = "
-                    f"{((last_close - take_profit) / last_close) * leverage * 100:.6f}%"
-                )
-                message = (
-                    f"Sell signal triggered for {symbol} at price {last_close:.6f}.\n"
-                    f"Take Profit: {take_profit:.6f}, Stop Loss: {stop_loss:.6f}.\n"
-                    f"{profit_formula}"
-                )
-                send_alert(message)
-            else:
-                logging.info(f"No signal for {symbol} at {df.iloc[-1]['timestamp']} (Close: {last_close:.6f})")
-
-            # Sleep briefly between symbols to honor rate limits
-            time.sleep(1)
+    # Cached states that no longer lined up with the exchange data get
+    # a second, full-history batch.
+    if rebuild:
+        for symbol in rebuild:
+            states.pop(symbol, None)
+        data = asyncio.run(fetch_all([(symbol, limit) for symbol in rebuild], timeframe))
+        process_round(rebuild, data, states, alerts)
+
+    save_states(states)
+
+    # Send all triggered alerts over one SMTP session after the sweep.
+    send_alerts(alerts)
+
+# -------------------------------
+# Streaming Mode (WebSocket)
+# -------------------------------
+# Instead of polling REST every cycle, ccxt.pro's watch_ohlcv pushes
+# candle updates over one WebSocket connection. Combined with the
+# incremental state cache, the bot sleeps between messages and does an
+# O(1) update when a bar closes, so the symbol list can grow without
+# multiplying REST calls. The polling main() stays as the fallback.
+
+def _bar_from_candle(candle):
+    """Turn a ccxt [ts, o, h, l, c, v] candle into an update() row."""
+    return {
+        'timestamp': pd.to_datetime(candle[0], unit='ms'),
+        'open': candle[1],
+        'high': candle[2],
+        'low': candle[3],
+        'close': candle[4],
+        'volume': candle[5],
+    }
+
+async def watch_symbol(exchange, symbol, states, timeframe='1h'):
+    """
+    Stream OHLCV for one symbol and keep its cached state warm. A new
+    timestamp in the stream means the previous candle closed; its final
+    snapshot is applied to the state and the signal is checked. Errors
+    back off and re-subscribe; the connection itself is shared across
+    the per-symbol tasks.
+    """
+    forming = None
+    while True:
+        try:
+            candles = await exchange.watch_ohlcv(symbol, timeframe)
         except Exception as e:
-            logging.error(f"Error processing {symbol}: {e}")
+            logger.error("Error watching OHLCV for %s: %s", symbol, e)
+            await asyncio.sleep(5)
+            continue
+        for candle in candles:
+            if forming is not None and candle[0] > forming[0]:
+                # The bar we were tracking closed; fold its final
+                # snapshot into the cached state.
+                bar = _bar_from_candle(forming)
+                state = states[symbol]
+                if bar['timestamp'] > state.last_timestamp:
+                    latest = state.update(bar)
+                    message = build_alert(symbol, latest)
+                    if message:
+                        # SMTP is blocking; keep it off the event loop.
+                        await asyncio.to_thread(send_alerts, [message])
+                    save_states(states)
+            if forming is None or candle[0] >= forming[0]:
+                forming = candle
 
-if __name__ == '__main__':
+async def stream_all(states, timeframe='1h'):
+    """
+    Run one watch task per cached symbol on a shared ccxt.pro client.
+    """
+    exchange = ccxt_pro.mexc({'enableRateLimit': True})
+    try:
+        await ensure_markets(exchange)
+        await asyncio.gather(*(
+            watch_symbol(exchange, symbol, states, timeframe)
+            for symbol in symbols if symbol in states
+        ))
+    finally:
+        await exchange.close()
+
+def stream_main():
+    """
+    WebSocket entry point: one REST sweep via main() seeds and
+    reconciles the state cache (and sends any initial alerts), then the
+    stream keeps the states warm until interrupted.
+    """
     main()
+    states = load_states()
+    if not states:
+        logger.error("No warm indicator state available; cannot stream.")
+        return
+    try:
+        asyncio.run(stream_all(states))
+    except KeyboardInterrupt:
+        logger.info("Streaming stopped.")
+    finally:
+        save_states(states)
+
+if __name__ == '__main__':
+    if '--stream' in sys.argv:
+        stream_main()
+    else:
+        main()